@@ -1,21 +1,60 @@
 from collections import namedtuple
+import copy
 from contextlib import contextmanager
 
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
-from pactman import Consumer, Provider
-from requests import Request
 
 ResponseDTO = namedtuple("ResponseDTO", ["status", "headers", "body"])
 WithRequestDTO = namedtuple(
     "WithRequestDTO", ["method", "path", "body", "headers", "query"]
 )
 
+# cache of already translated requests, parametrized tests tend to build the same request over and over again
+_REQUEST_CACHE = {}
+_REQUEST_CACHE_SIZE = 512
+
+# pact objects shared by all test cases, keyed by (consumer_name, provider_name, mock_server_port)
+_PACT_CACHE = {}
+
+
+def _freeze(value):
+    # turn the (possibly nested) arguments of a request into something hashable, the type is kept as part
+    # of the key, so that e.g. `True` and `1` don't end up with the same cached request. The order of dict
+    # keys is kept as well, since it determines the order within the body built by requests
+    if isinstance(value, dict):
+        return dict, tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(_freeze(item) for item in value)
+    if value is None or isinstance(value, (str, bytes, int, float)):
+        return type(value), value
+    raise TypeError(f"{type(value).__name__} is not supported as cache key")
+
 
 class PactRequestMimic:
     # mimics the behavior of the `requests` module for pact tests
     @classmethod
     def request(cls, method, url, **kwargs) -> WithRequestDTO:
+        try:
+            key = (method, url, _freeze(kwargs))
+        except TypeError:
+            # arguments that can't be compared by value, e.g. file objects, are never cached
+            return cls._build_request(method, url, **kwargs)
+        request = _REQUEST_CACHE.get(key)
+        if request is None:
+            # the cached request must not share any mutable arguments with the caller
+            request = cls._build_request(method, url, **copy.deepcopy(kwargs))
+            if len(_REQUEST_CACHE) >= _REQUEST_CACHE_SIZE:
+                # evict the oldest entry
+                del _REQUEST_CACHE[next(iter(_REQUEST_CACHE))]
+            _REQUEST_CACHE[key] = request
+        # only hand out copies, so that changes to a returned request don't leak into other tests
+        return request._replace(headers=dict(request.headers), query=copy.deepcopy(request.query))
+
+    @classmethod
+    def _build_request(cls, method, url, **kwargs) -> WithRequestDTO:
+        from requests import Request
+
         # pact requires the query to be built by themselves, so let's move the "params"
         # (which is the "query" for requests) to the side instead of using the requests module to do it for us
         query = kwargs.pop("params", None)
@@ -26,9 +65,8 @@ class PactRequestMimic:
         prepared_request = r.prepare()
         # the prepared request should now contain all the things we need for the pact's "with_request" method.
         # The returned DTO contains all args for the "with_request" method.
-        headers = dict(prepared_request.headers)
-        # remove the Content-Length header added by requests
-        headers.pop("Content-Length", "")
+        # copy the headers, except for the Content-Length header added by requests
+        headers = {key: value for key, value in prepared_request.headers.items() if key != "Content-Length"}
         return WithRequestDTO(
             method=prepared_request.method,
             path=url,
@@ -125,8 +163,6 @@ class ConsumerPactTest(TestCase):
     provider_request_description = None
     mock_server_port = 8155
 
-    _pact = None
-
     requests = PactRequestMimic
 
     @classmethod
@@ -134,30 +170,41 @@ class ConsumerPactTest(TestCase):
         return ResponseDTO(status=status, headers=headers, body=body)
 
     def get_pact(self):
-        if not self.__class__._pact:
-            self.__class__._pact = Consumer(self.consumer_name).has_pact_with(
+        key = (self.consumer_name, self.provider_name, self.mock_server_port)
+        pact = _PACT_CACHE.get(key)
+        if pact is None:
+            from pactman import Consumer, Provider
+
+            pact = _PACT_CACHE[key] = Consumer(self.consumer_name).has_pact_with(
                 Provider(self.provider_name), version="3.0.0", port=self.mock_server_port
             )
-        return self.__class__._pact
+        return pact
 
     def __init__(self, *args, **kwargs):
-        if self.consumer_name is None:
+        # the test runner creates an instance per test method, validate the configuration only once per class
+        if not self.__class__.__dict__.get("_configuration_validated", False):
+            self._validate_configuration()
+            self.__class__._configuration_validated = True
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def _validate_configuration(cls):
+        if cls.consumer_name is None:
             raise ImproperlyConfigured(
                 f'You need to set "consumer_name" e.g. "RequestSenderService"'
             )
-        if self.provider_name is None:
+        if cls.provider_name is None:
             raise ImproperlyConfigured(
                 f'You need to set "provider_name" e.g. "RequestReceiverService"'
             )
-        if self.provider_state_description is None:
+        if cls.provider_state_description is None:
             raise ImproperlyConfigured(
                 f'You need to set "provider_state_description" e.g. "a user with the id 123 exists" '
             )
-        if self.provider_request_description is None:
+        if cls.provider_request_description is None:
             raise ImproperlyConfigured(
                 f'You need to set "provider_request_description" e.g. "deletion request for user 123"'
             )
-        super().__init__(*args, **kwargs)
 
     @contextmanager
     def pact_mock_server(self, request: WithRequestDTO, response: ResponseDTO):
@@ -1,7 +1,5 @@
 from contextlib import ExitStack, contextmanager
 import logging
-from functools import wraps
-from pactman.verifier.verify import ProviderStateError
 
 logger = logging.getLogger(__name__)
 
@@ -11,12 +9,14 @@ class PactStates:
         self.state_registry = {}
 
     def _get(self, consumer, state_name):
-        try:
-            return self.state_registry[(consumer, state_name)]
-        except KeyError:
+        entry = self.state_registry.get((consumer, state_name))
+        if entry is None:
+            from pactman.verifier.verify import ProviderStateError
+
             raise ProviderStateError(
                 f"Missing state provider for consumer:\n@pact_state('{consumer}', '{state_name}')"
             )
+        return entry
 
     def _set(self, consumer, state_name, func, mocks):
         self.state_registry[(consumer, state_name)] = (func, mocks)
@@ -30,9 +30,17 @@ class PactStates:
         return mocks
 
     @contextmanager
-    def enable_mocks(self, consumer_name, state_name):
+    def enable_mocks(self, mocks):
+        # most states don't use any mocks, so only set up an ExitStack when it's really needed
+        if not mocks:
+            yield
+            return
+        if len(mocks) == 1:
+            with mocks[0]():
+                yield
+            return
         with ExitStack() as stack:
-            for mock in self.get_mocks(consumer_name, state_name):
+            for mock in mocks:
                 stack.enter_context(mock())
             yield
 
@@ -42,19 +50,15 @@ class PactStates:
 
         def outer(func):
             self._set(consumer, state_name, func, mocks)
-
-            @wraps(func)
-            def inner(*args, **kwds):
-                return func(*args, **kwds)
-
-            return inner
+            return func
 
         return outer
 
 
-def _make_provider_state(pact_registry):
+def _make_provider_state(func):
+    # the state function is looked up once per interaction in `verify_pacts`, so just call it here
     def provider_state(interaction, name, **params):
-        pact_registry.prepare_state(interaction.pact.consumer, name)
+        func()
 
     return provider_state
 
@@ -69,5 +73,6 @@ def verify_pacts(pact_verifier, live_server, states):
         state_name = pact_verifier.interaction.providerStates[0]["name"]
     consumer_name = pact_verifier.interaction.pact.consumer
 
-    with states.enable_mocks(consumer_name, state_name):
-        pact_verifier.verify(live_server.url, _make_provider_state(states))
+    func, mocks = states._get(consumer_name, state_name)
+    with states.enable_mocks(mocks):
+        pact_verifier.verify(live_server.url, _make_provider_state(func))
@@ -1,13 +1,40 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import argparse
+import base64
+import fnmatch
+import os
 import pathlib
-import json
+import re
+
+# upper bound for concurrent requests against the pact-broker, also used as connection pool size
+MAX_WORKERS = 16
 
 
 class PublishingFailedException(Exception):
     pass
 
 
+def _match_glob(patterns, parts):
+    # like Path.glob(f"**/{glob}"): the patterns have to match the trailing path components
+    return any(_match_parts(patterns, parts[start:]) for start in range(len(parts)))
+
+
+def _match_parts(patterns, parts):
+    if not patterns:
+        return not parts
+    pattern = patterns[0]
+    if pattern == "**":
+        return any(_match_parts(patterns[1:], parts[start:]) for start in range(len(parts) + 1))
+    return bool(parts) and bool(pattern.match(parts[0])) and _match_parts(patterns[1:], parts[1:])
+
+
+def _read_pact(path):
+    # unbuffered binary read: no text decoding and no BufferedReader, the file is read in one go
+    with open(path, "rb", buffering=0) as stream:
+        return stream.read()
+
+
 class PactBrokerInterface:
     """ Interface to a pact-broker instance
 
@@ -36,7 +63,37 @@ class PactBrokerInterface:
         self.auth = (self.user, self.password)
         self.glob = glob
         self.sep = sep
+        # the glob is matched per path component, relative to the searched directory, like "**/{glob}"
+        self._glob_parts = [
+            part if part == "**" else re.compile(fnmatch.translate(part)) for part in glob.split("/")
+        ]
         self.headers = {'Content-Type': 'application/json'}
+        # URL prefixes are shared by all pacts and tags, so only build them once
+        self._pact_url_prefix = f"{self.url}/pacts/provider/"
+        self._tag_url_prefix = f"{self.url}/pacticipants/"
+        # requests is imported lazily, so that argument parsing doesn't pay for loading the SSL stack
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # reuse connections, DNS lookups and auth across all pact and tag requests
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=10, pool_maxsize=MAX_WORKERS, max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def find_pacts(self, pact_path=".", version="1.0.0"):
         """ Find local pact files and prepare publication
@@ -52,62 +109,196 @@ class PactBrokerInterface:
         -------
         dict
             Keys:   Pact file name
-            Values: URL & body for publication to pact-broker
+            Values: URL, raw JSON body (bytes), consumer & provider name for publication to pact-broker
+        """
+
+        return dict(self.iter_pacts(pact_path, version))
+
+    def iter_pacts(self, pact_path=".", version="1.0.0"):
+        """ Find local pact files and prepare a streamed publication
+
+        All file names are validated right away, but the files are only read while iterating, so that
+        the publication can already start while the remaining files are still being read.
+
+        Parameters
+        ----------
+        pact_path : str
+            Filepath or directory containing pact JSON file
+        version : str
+            (Consumer) application version
+
+        Returns
+        -------
+        iterator
+            (Pact file name, publication) tuples, like the items of PactBrokerInterface.find_pacts(...)
         """
 
-        publication = {}
         path = pathlib.Path(pact_path)
         if not path.exists():
             raise ValueError(f"Unable to find {pact_path}. No such file or directory.")
         if path.is_dir():
-            pathlist = path.glob(f"**/{self.glob}")
-            for pact in pathlist:
-                consumer, provider, _ = pact.stem.split(self.sep)
-                publish_url = f"{self.url}/pacts/provider/{provider}/consumer/{consumer}/version/{version}"
-                with open(pact, "r") as stream:
-                    data = json.load(stream)
-                publication[pact.name] = {"url": publish_url, "data": data}
+            pacts = [(entry.name, entry.path) for entry in self._iter_pact_files(path)]
         elif path.is_file() and path.suffix.lower() == ".json":
-            consumer, provider, _ = path.stem.split(self.sep)
-            publish_url = f"{self.url}/pacts/provider/{provider}/consumer/{consumer}/version/{version}"
-            with open(path, "r") as stream:
-                data = json.load(stream)
-            publication[path.name] = {"url": publish_url, "data": data}
-        return publication
+            pacts = [(path.name, path)]
+        else:
+            pacts = []
+
+        parsed = []
+        for name, pact_path in pacts:
+            consumer, provider = self._parse_pact_name(os.path.splitext(name)[0])
+            parsed.append((name, pact_path, consumer, provider))
+        return self._read_pacts(parsed, version)
+
+    def _read_pacts(self, parsed, version):
+        for name, pact_path, consumer, provider in parsed:
+            publish_url = self._pact_url_prefix + provider + "/consumer/" + consumer + "/version/" + version
+            # the broker only needs the raw JSON, so there is no need to parse and re-serialize it
+            data = _read_pact(pact_path)
+            yield name, {"url": publish_url, "data": data, "consumer": consumer, "provider": provider}
+
+    def _iter_pact_files(self, root):
+        # walk the tree iteratively using os.scandir, which avoids creating a Path object
+        # for every directory and file that doesn't match the glob pattern
+        name_only = len(self._glob_parts) == 1
+        stack = [(root, ())]
+        while stack:
+            path, parts = stack.pop()
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, parts + (entry.name,)))
+                    elif name_only:
+                        if self._glob_parts[0].match(entry.name):
+                            yield entry
+                    elif _match_glob(self._glob_parts, parts + (entry.name,)):
+                        yield entry
+
+    def _parse_pact_name(self, stem):
+        # names containing the separator can't be told apart from the separator itself,
+        # so reject them instead of publishing the pact for the wrong pacticipant
+        parts = stem.split(self.sep)
+        if len(parts) != 3 or not all(parts[:2]):
+            raise ValueError(
+                f"Unable to extract Consumer/Producer name from {stem}. Expected "
+                f"'<consumer>{self.sep}<provider>{self.sep}<suffix>' with consumer and provider names "
+                f"not containing the separator {self.sep!r}."
+            )
+        consumer, provider, _ = parts
+        return consumer, provider
+
+    def _get_pact_names(self, name, entry):
+        # publications built before the consumer & provider names were added only contain URL & body
+        if "consumer" in entry and "provider" in entry:
+            return entry["consumer"], entry["provider"]
+        return self._parse_pact_name(os.path.splitext(name)[0])
 
     def publish(self, publication):
         """ Publish pact to pact-broker instance
 
         Parameters
         ----------
-        publication : dict
+        publication : iterable or dict
             Keys:   Pact file name
-            Values: URL & body for publication to pact-broker
-            Returned by PactBrokerInterface.find_pacts(...)
+            Values: URL & body for publication to pact-broker, optionally consumer & provider name
+                    (otherwise extracted from the pact file name)
+            Returned by PactBrokerInterface.find_pacts(...), or the (Pact file name, publication)
+            tuples returned by PactBrokerInterface.iter_pacts(...)
+
+        Returns
+        -------
+        set
+            Names of the consumers of the published pacts
         """
 
-        for name in publication:
-            response = requests.put(publication[name]["url"], json=publication[name]["data"], auth=self.auth)
+        if isinstance(publication, dict):
+            publication = publication.items()
+        consumers = set()
+        # every pact is sent as soon as it has been read, so reading files and uploading them overlaps
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = []
+            for name, entry in publication:
+                consumers.add(self._get_pact_names(name, entry)[0])
+                futures.append((name, executor.submit(self.session.put, entry["url"], data=entry["data"])))
+
+        for name, future in futures:
+            response = future.result()
             response.raise_for_status()
             if response.status_code == 201:
                 print(f"Published new pact {name} to {self.url}")
             elif response.status_code == 200:
                 print(f"Published pact update {name} to {self.url}")
+        return consumers
+
+    def publish_batched(self, publication, version, tags):
+        """ Publish and tag pacts with a single request per consumer
+
+        Uses the `/contracts/publish` endpoint of the pact-broker (available since 2.84), older
+        instances fall back to publishing each pact and tag separately.
+
+        Parameters
+        ----------
+        publication : iterable or dict
+            Keys:   Pact file name
+            Values: URL & body for publication to pact-broker, optionally consumer & provider name
+                    (otherwise extracted from the pact file name)
+            Returned by PactBrokerInterface.find_pacts(...), or the (Pact file name, publication)
+            tuples returned by PactBrokerInterface.iter_pacts(...)
+        version : str
+            (Consumer) application version
+        tags : list
+            Consumer tags for the version
+        """
+
+        if isinstance(publication, dict):
+            publication = publication.items()
+        by_consumer = {}
+        for name, entry in publication:
+            consumer, provider = self._get_pact_names(name, entry)
+            by_consumer.setdefault(consumer, {})[name] = dict(entry, consumer=consumer, provider=provider)
+
+        contracts_supported = True
+        for consumer, pacts in by_consumer.items():
+            if not contracts_supported:
+                self._publish_and_tag(pacts, consumer, version, tags)
+                continue
+            body = {
+                "pacticipantName": consumer,
+                "pacticipantVersionNumber": version,
+                "tags": list(tags),
+                "contracts": [
+                    {
+                        "consumerName": consumer,
+                        "providerName": entry["provider"],
+                        "specification": "pact",
+                        "contentType": "application/json",
+                        "content": base64.b64encode(entry["data"]).decode("ascii"),
+                    }
+                    for entry in pacts.values()
+                ],
+            }
+            response = self.session.post(f"{self.url}/contracts/publish", json=body)
+            if response.status_code in (404, 405):
+                # pact-broker doesn't support the endpoint yet, don't try again for the remaining consumers
+                contracts_supported = False
+                self._publish_and_tag(pacts, consumer, version, tags)
+                continue
+            response.raise_for_status()
+            print(f"Published {len(pacts)} pact(s) of {consumer} version {version} to {self.url}")
+
+    def _publish_and_tag(self, pacts, consumer, version, tags):
+        self.publish(pacts)
+        for tag in tags:
+            self.tag_version(consumer, version, tag)
 
     def tag_version(self, participant, version, tag):
-        tag_url = f'{self.url}/pacticipants/{participant}/versions/{version}/tags/{tag}'
-        response = requests.put(
-            tag_url, auth=self.auth, headers={'Content-Length': '0', 'Content-Type': 'application/json'}
-        )
+        tag_url = self._tag_url_prefix + participant + '/versions/' + version + '/tags/' + tag
+        response = self.session.put(tag_url, headers={'Content-Length': '0'})
         response.raise_for_status()
         if 200 <= response.status_code < 300:
             print(f'Tagged {participant} version {version} to with {tag}')
 
     def get_consumers(self, publication):
-        consumers = set()
-        for name in publication:
-            consumers.add(name.split(self.sep, 1)[0])
-        return list(consumers)
+        return list({self._get_pact_names(name, entry)[0] for name, entry in publication.items()})
 
 
 def main():
@@ -140,16 +331,26 @@ def main():
     parser.add_argument(
         "-t", "--tag", help="Consumer tag for the version", default="latest", type=str, dest="tag"
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        help="Publish all pacts of a consumer in a single request (pact-broker >= 2.84)",
+        action="store_true",
+        dest="batch",
+    )
     args = parser.parse_args()
 
-    broker = PactBrokerInterface(args.url, args.username, args.password, args.glob, args.sep)
-
-    publication = broker.find_pacts(args.path, args.version)
-    broker.publish(publication)
-
-    for consumer in broker.get_consumers(publication):
-        broker.tag_version(consumer, args.version, args.tag)
-
+    with PactBrokerInterface(args.url, args.username, args.password, args.glob, args.sep) as broker:
+        publication = broker.iter_pacts(args.path, args.version)
+        if args.batch:
+            broker.publish_batched(publication, args.version, [args.tag])
+        else:
+            consumers = broker.publish(publication)
+            if consumers:
+                with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(consumers))) as executor:
+                    # consume the results, so that errors raised while tagging are not swallowed
+                    tag_version = partial(broker.tag_version, version=args.version, tag=args.tag)
+                    list(executor.map(tag_version, consumers))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+import pytest
+
+from pact_test_utils import consumer
+from pact_test_utils.consumer import PactRequestMimic
+
+
+def test_request_is_not_affected_by_changes_to_the_arguments():
+    params = {"page": 1}
+    PactRequestMimic.get("/mutated-params", params=params)
+    params["page"] = 2
+
+    request = PactRequestMimic.get("/mutated-params", params={"page": 1})
+    assert request.query == {"page": 1}
+
+
+def test_request_is_not_affected_by_changes_to_previous_requests():
+    request = PactRequestMimic.get("/mutated-request", params={"page": 1}, headers={"x-api-key": "key"})
+    request.headers["x-api-key"] = "other-key"
+    request.query["page"] = 2
+
+    request = PactRequestMimic.get("/mutated-request", params={"page": 1}, headers={"x-api-key": "key"})
+    assert request.headers == {"x-api-key": "key"}
+    assert request.query == {"page": 1}
+
+
+def test_request_body_keeps_the_order_of_the_arguments():
+    assert PactRequestMimic.post("/form", data={"a": 1, "b": 2}).body == "a=1&b=2"
+    assert PactRequestMimic.post("/form", data={"b": 2, "a": 1}).body == "b=2&a=1"
+    assert PactRequestMimic.post("/json", json={"a": 1, "b": 2}).body == b'{"a": 1, "b": 2}'
+    assert PactRequestMimic.post("/json", json={"b": 2, "a": 1}).body == b'{"b": 2, "a": 1}'
+
+
+def test_request_headers_without_content_length():
+    request = PactRequestMimic.post("/json", json={"id": 123}, headers={"x-api-key": "key"})
+    assert request.method == "POST"
+    assert request.path == "/json"
+    assert request.body == b'{"id": 123}'
+    assert request.headers == {"x-api-key": "key", "Content-Type": "application/json"}
+
+
+def test_pact_mock_server_reads_descriptions_at_call_time():
+    class DescriptionsPactTest(consumer.ConsumerPactTest):
+        consumer_name = "Consumer"
+        provider_name = "Provider"
+        provider_state_description = "class state"
+        provider_request_description = "class request"
+
+        def test_pact(self):
+            pass
+
+    DescriptionsPactTest.provider_state_description = "changed state"
+    test = DescriptionsPactTest("test_pact")
+    test.provider_request_description = "instance request"
+    pact = mock.MagicMock()
+    with mock.patch.object(test, "get_pact", return_value=pact):
+        with test.pact_mock_server(test.requests.get("/x"), test.response(200)):
+            pass
+
+    pact.given.assert_called_once_with("changed state")
+    pact.given.return_value.upon_receiving.assert_called_once_with("instance request")
+
+
+def test_base_class_without_configuration():
+    class BasePactTest(consumer.ConsumerPactTest):
+        consumer_name = "Consumer"
+
+        def helper(self):
+            pass
+
+    class MisconfiguredTestsPactTest(consumer.ConsumerPactTest):
+        def test_pact(self):
+            pass
+
+    # defining the classes alone must not raise, only running a test of them does
+    with pytest.raises(ImproperlyConfigured):
+        MisconfiguredTestsPactTest("test_pact")
+
+
+def test_mixin_configured_subclass():
+    class ProviderMixin:
+        provider_name = "Provider"
+        provider_state_description = "a user with the id 123 exists"
+
+    class MixinPactTest(ProviderMixin, consumer.ConsumerPactTest):
+        consumer_name = "Consumer"
+        provider_request_description = "deletion request for user 123"
+
+        def test_pact(self):
+            pass
+
+    MixinPactTest("test_pact")
+
+
+def test_configuration_set_after_class_creation():
+    class LatePactTest(consumer.ConsumerPactTest):
+        def test_pact(self):
+            pass
+
+    LatePactTest.consumer_name = "Consumer"
+    LatePactTest.provider_name = "Provider"
+    LatePactTest.provider_state_description = "a user with the id 123 exists"
+    LatePactTest.provider_request_description = "deletion request for user 123"
+    LatePactTest("test_pact")
+
+
+@pytest.mark.parametrize(
+    "missing",
+    ["consumer_name", "provider_name", "provider_state_description", "provider_request_description"],
+)
+def test_misconfigured_subclass(missing):
+    attrs = {
+        "consumer_name": "Consumer",
+        "provider_name": "Provider",
+        "provider_state_description": "a user with the id 123 exists",
+        "provider_request_description": "deletion request for user 123",
+        "test_pact": lambda self: None,
+    }
+    del attrs[missing]
+    MisconfiguredPactTest = type("MisconfiguredPactTest", (consumer.ConsumerPactTest,), attrs)
+
+    with pytest.raises(ImproperlyConfigured, match=missing):
+        MisconfiguredPactTest("test_pact")
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from pactman.verifier.verify import ProviderStateError
+import pytest
+
+from pact_test_utils.producer import PactStates, verify_pacts
+
+
+class StubVerifier:
+    def __init__(self, consumer, state_name, events):
+        self.interaction = SimpleNamespace(providerState=state_name, pact=SimpleNamespace(consumer=consumer))
+        self.events = events
+
+    def verify(self, url, provider_state):
+        self.events.append(("verify", url))
+        provider_state(self.interaction, self.interaction.providerState)
+
+
+def make_mock(name, events):
+    @contextmanager
+    def mock():
+        events.append(("enter", name))
+        yield
+        events.append(("exit", name))
+
+    return mock
+
+
+LIVE_SERVER = SimpleNamespace(url="http://live-server")
+
+
+@pytest.mark.parametrize("mock_names", [[], ["first"], ["first", "second"]])
+def test_verify_pacts(mock_names):
+    events = []
+    states = PactStates()
+
+    def state():
+        events.append(("state", "a user exists"))
+
+    registered = states.add(
+        "Consumer", "a user exists", mocks=[make_mock(name, events) for name in mock_names]
+    )(state)
+
+    verify_pacts(StubVerifier("Consumer", "a user exists", events), LIVE_SERVER, states)
+
+    assert registered is state
+    assert events == (
+        [("enter", name) for name in mock_names]
+        + [("verify", "http://live-server"), ("state", "a user exists")]
+        + [("exit", name) for name in reversed(mock_names)]
+    )
+
+
+def test_verify_pacts_with_provider_states_list():
+    events = []
+    states = PactStates()
+    states.add("Consumer", "a user exists")(lambda: events.append("state"))
+    verifier = StubVerifier("Consumer", None, events)
+    verifier.interaction.providerStates = [{"name": "a user exists"}]
+    verifier.verify = lambda url, provider_state: provider_state(verifier.interaction, "a user exists")
+
+    verify_pacts(verifier, LIVE_SERVER, states)
+
+    assert events == ["state"]
+
+
+def test_verify_pacts_missing_state():
+    states = PactStates()
+    states.add("Consumer", "a user exists")(lambda: None)
+
+    with pytest.raises(ProviderStateError):
+        verify_pacts(StubVerifier("Consumer", "no user exists", []), LIVE_SERVER, states)
+    with pytest.raises(ProviderStateError):
+        verify_pacts(StubVerifier("OtherConsumer", "a user exists", []), LIVE_SERVER, states)
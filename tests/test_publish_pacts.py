@@ -0,0 +1,187 @@
+import base64
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from pact_test_utils.publish_pacts import PactBrokerInterface
+
+
+class FakeSession:
+    def __init__(self, post_status=200):
+        self.puts = []
+        self.posts = []
+        self.post_status = post_status
+
+    def put(self, url, **kwargs):
+        self.puts.append(url)
+        return SimpleNamespace(status_code=201, raise_for_status=lambda: None)
+
+    def post(self, url, json=None):
+        self.posts.append((url, json))
+        return SimpleNamespace(status_code=self.post_status, raise_for_status=self._raise_for_status)
+
+    def _raise_for_status(self):
+        if self.post_status >= 400:
+            raise requests.HTTPError(f"{self.post_status} Error")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def broker():
+    with PactBrokerInterface("https://broker.example/", "user", "password") as broker:
+        broker.session = FakeSession()
+        yield broker
+
+
+def test_find_pacts(broker, tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "svc-prov-pact.json").write_bytes(b'{"a": 1}')
+    (tmp_path / "sub" / "other-prov-pact.json").write_bytes(b'{"b": 2}')
+    (tmp_path / "sub" / "readme.txt").write_bytes(b"")
+
+    publication = broker.find_pacts(str(tmp_path), "1.2.3")
+    assert publication == {
+        "svc-prov-pact.json": {
+            "url": "https://broker.example/pacts/provider/prov/consumer/svc/version/1.2.3",
+            "data": b'{"a": 1}',
+            "consumer": "svc",
+            "provider": "prov",
+        },
+        "other-prov-pact.json": {
+            "url": "https://broker.example/pacts/provider/prov/consumer/other/version/1.2.3",
+            "data": b'{"b": 2}',
+            "consumer": "other",
+            "provider": "prov",
+        },
+    }
+
+
+def test_invalid_pact_name_fails_before_publishing(broker, tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "svc-prov-pact.json").write_bytes(b"{}")
+    (tmp_path / "sub" / "zzbad-pact.json").write_bytes(b"{}")
+
+    with pytest.raises(ValueError):
+        broker.publish(broker.iter_pacts(str(tmp_path)))
+    assert broker.session.puts == []
+
+
+def test_publish_streamed_pacts(broker, tmp_path):
+    (tmp_path / "svc-prov-pact.json").write_bytes(b"{}")
+
+    broker.publish(broker.iter_pacts(str(tmp_path), "1.2.3"))
+    assert broker.session.puts == ["https://broker.example/pacts/provider/prov/consumer/svc/version/1.2.3"]
+
+
+def test_consumers(broker, tmp_path):
+    (tmp_path / "svc-prov-pact.json").write_bytes(b"{}")
+    (tmp_path / "svc-other-pact.json").write_bytes(b"{}")
+    (tmp_path / "client-prov-pact.json").write_bytes(b"{}")
+
+    assert sorted(broker.get_consumers(broker.find_pacts(str(tmp_path)))) == ["client", "svc"]
+    assert broker.publish(broker.iter_pacts(str(tmp_path))) == {"client", "svc"}
+
+
+@pytest.mark.parametrize("name", ["svc-a-prov-pact.json", "svcprov-pact.json", "-prov-pact.json"])
+def test_ambiguous_pact_name(broker, tmp_path, name):
+    (tmp_path / name).write_bytes(b"{}")
+
+    with pytest.raises(ValueError, match="<consumer>-<provider>-<suffix>"):
+        broker.find_pacts(str(tmp_path))
+
+
+@pytest.mark.parametrize(
+    "glob, expected",
+    [
+        ("*-pact.json", ["other-prov-pact.json", "svc-prov-pact.json", "top-prov-pact.json"]),
+        ("pacts/*-pact.json", ["other-prov-pact.json", "svc-prov-pact.json"]),
+        ("sub/pacts/*-pact.json", ["other-prov-pact.json"]),
+        ("sub/**/*-pact.json", ["other-prov-pact.json"]),
+        ("svc-*.json", ["svc-prov-pact.json"]),
+    ],
+)
+def test_find_pacts_glob(tmp_path, glob, expected):
+    (tmp_path / "pacts").mkdir()
+    (tmp_path / "sub" / "pacts").mkdir(parents=True)
+    (tmp_path / "top-prov-pact.json").write_bytes(b"{}")
+    (tmp_path / "pacts" / "svc-prov-pact.json").write_bytes(b"{}")
+    (tmp_path / "sub" / "pacts" / "other-prov-pact.json").write_bytes(b"{}")
+
+    with PactBrokerInterface("https://broker.example/", "user", "password", glob=glob) as broker:
+        assert sorted(broker.find_pacts(str(tmp_path))) == expected
+        # same files as the Path.glob based lookup used before
+        assert sorted(path.name for path in tmp_path.glob(f"**/{glob}")) == expected
+
+
+def test_publication_without_consumer_and_provider(broker):
+    url = "https://broker.example/pacts/provider/prov/consumer/"
+    publication = {
+        "svc-prov-pact.json": {"url": url + "svc", "data": b"{}"},
+        "client-prov-pact.json": {"url": url + "client", "data": b"{}"},
+    }
+
+    assert sorted(broker.get_consumers(publication)) == ["client", "svc"]
+    assert broker.publish(publication) == {"client", "svc"}
+
+
+
+@pytest.fixture
+def pact_tree(tmp_path):
+    (tmp_path / "svc-prov-pact.json").write_bytes(b'{"a": 1}')
+    (tmp_path / "svc-other-pact.json").write_bytes(b'{"b": 2}')
+    (tmp_path / "client-prov-pact.json").write_bytes(b'{"c": 3}')
+    return str(tmp_path)
+
+
+def test_publish_batched(broker, pact_tree):
+    broker.publish_batched(broker.find_pacts(pact_tree, "1.2.3"), "1.2.3", ["latest", "prod"])
+
+    assert broker.session.puts == []
+    bodies = {body["pacticipantName"]: body for url, body in broker.session.posts}
+    assert [url for url, body in broker.session.posts] == ["https://broker.example/contracts/publish"] * 2
+    assert sorted(bodies) == ["client", "svc"]
+    assert bodies["svc"]["pacticipantVersionNumber"] == "1.2.3"
+    assert bodies["svc"]["tags"] == ["latest", "prod"]
+    contracts = sorted(bodies["svc"]["contracts"], key=lambda contract: contract["providerName"])
+    assert contracts == [
+        {
+            "consumerName": "svc",
+            "providerName": "other",
+            "specification": "pact",
+            "contentType": "application/json",
+            "content": base64.b64encode(b'{"b": 2}').decode("ascii"),
+        },
+        {
+            "consumerName": "svc",
+            "providerName": "prov",
+            "specification": "pact",
+            "contentType": "application/json",
+            "content": base64.b64encode(b'{"a": 1}').decode("ascii"),
+        },
+    ]
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_publish_batched_falls_back_for_old_brokers(broker, pact_tree, status):
+    broker.session.post_status = status
+    broker.publish_batched(broker.find_pacts(pact_tree, "1.2.3"), "1.2.3", ["latest"])
+
+    # the missing endpoint is only detected once
+    assert len(broker.session.posts) == 1
+    assert sorted(broker.session.puts) == [
+        "https://broker.example/pacticipants/client/versions/1.2.3/tags/latest",
+        "https://broker.example/pacticipants/svc/versions/1.2.3/tags/latest",
+        "https://broker.example/pacts/provider/other/consumer/svc/version/1.2.3",
+        "https://broker.example/pacts/provider/prov/consumer/client/version/1.2.3",
+        "https://broker.example/pacts/provider/prov/consumer/svc/version/1.2.3",
+    ]
+
+
+def test_publish_batched_raises_errors(broker, pact_tree):
+    broker.session.post_status = 500
+    with pytest.raises(requests.HTTPError):
+        broker.publish_batched(broker.find_pacts(pact_tree, "1.2.3"), "1.2.3", ["latest"])
+    assert broker.session.puts == []